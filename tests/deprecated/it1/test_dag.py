@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import pytest
+
+from ydag.deprecated.it1.dag import Dag, DagContext, Task, TaskResult, DagDefinitionError, DagFailedError, State, Trigger
+
+
+class ReturnValueTask(Task[int]):
+    def __init__(self, *, value: int, **kwargs):
+        super().__init__(**kwargs)
+        self.value = value
+
+    async def run(self, value: int) -> int:
+        return value
+
+
+class AddOneTask(Task[int]):
+    def __init__(self, *, x: TaskResult[int], **kwargs):
+        super().__init__(**kwargs)
+        self.x = x
+
+    async def run(self, x: int) -> int:
+        return x + 1
+
+
+class FailTask(Task[None]):
+    async def run(self) -> None:
+        raise RuntimeError("This task always fails")
+
+
+class WaitTask(Task[None]):
+    async def run(self) -> None:
+        await asyncio.sleep(0.05)
+
+
+class SlowTask(Task[None]):
+    async def run(self) -> None:
+        await asyncio.sleep(0.5)
+
+
+class TimeTask(Task[float]):
+    async def run(self) -> float:
+        return time.perf_counter()
+
+
+class TestDagRun:
+    def test_chain(self):
+        # Given a chain of tasks, each using the result of the previous one
+        with Dag(id="dag") as dag:
+            task1 = ReturnValueTask(id="one", value=1)
+            task2 = AddOneTask(id="two", x=task1.result())
+            task3 = AddOneTask(id="three", x=task2.transform(lambda x: x * 10))
+            task1 >> task2 >> task3
+        # When the dag is run
+        dag_run = dag.run()
+        # Then the results should be correct
+        assert dag_run.get_result_for_task(task3) == 21
+        assert dag_run.task_instances["three"].state == State.SUCCEEDED
+
+    def test_failed_upstream(self):
+        # Given a task that fails, and a task depending on it
+        with Dag(id="dag") as dag:
+            task1 = FailTask(id="fail")
+            ReturnValueTask(id="one", value=1, await_tasks=[task1])
+        # When the dag is run
+        dag_run = dag.run()
+        # Then the failure should propagate downstream, without running the dependent task
+        assert dag_run.task_instances["fail"].state == State.FAILED
+        assert dag_run.task_instances["one"].state == State.UPSTREAM_FAILED
+        assert dag_run.task_instances["one"].async_task is None
+        with pytest.raises(DagFailedError):
+            dag_run.raise_any_error()
+
+    def test_skipped_upstream(self):
+        # Given a task that fails softly, and a task depending on it
+        with Dag(id="dag") as dag:
+            task1 = FailTask(id="fail", soft_fail=True)
+            ReturnValueTask(id="one", value=1, await_tasks=[task1])
+        # When the dag is run
+        dag_run = dag.run()
+        # Then the skip should propagate downstream, without running the dependent task
+        assert dag_run.task_instances["fail"].state == State.SKIPPED
+        assert dag_run.task_instances["one"].state == State.UPSTREAM_SKIPPED
+        assert dag_run.task_instances["one"].async_task is None
+
+    def test_all_done_after_upstream_failed(self):
+        # Given a slow task, and next to it a failing task with an all_done task below an upstream failed task
+        with Dag(id="dag") as dag:
+            SlowTask(id="slow")
+            task1 = WaitTask(id="wait")
+            task2 = FailTask(id="fail", await_tasks=[task1])
+            task3 = ReturnValueTask(id="one", value=1, await_tasks=[task2])
+            task4 = TimeTask(id="cleanup", trigger=Trigger.ALL_DONE, await_tasks=[task3])
+        # When the dag is run
+        tic = time.perf_counter()
+        dag_run = dag.run()
+        # Then the all_done task should have run without waiting for the slow task
+        assert dag_run.task_instances["one"].state == State.UPSTREAM_FAILED
+        assert dag_run.get_result_for_task(task4) - tic < 0.3
+
+    def test_max_concurrency(self):
+        # Given 3 independent tasks that take some time to complete
+        with Dag(id="dag") as dag:
+            for i in range(3):
+                WaitTask(id=f"wait_{i}")
+        # When the dag is run with a concurrency of 1
+        tic = time.perf_counter()
+        dag_run = dag.run(max_concurrency=1)
+        toc = time.perf_counter()
+        # Then all tasks should have succeeded, one after another
+        assert all(ti.state == State.SUCCEEDED for ti in dag_run.task_instances.values())
+        assert toc - tic >= 0.15
+
+    def test_cycle(self):
+        # Given two dependent tasks
+        with Dag(id="dag") as dag:
+            task1 = ReturnValueTask(id="one", value=1)
+            task2 = ReturnValueTask(id="also_one", value=1)
+            task1 >> task2
+        # When the reverse dependency is added
+        # Then it should fail
+        with pytest.raises(DagDefinitionError):
+            task2 >> task1
+        # And the dag should be left as it was
+        assert dag.predecessor_ids(task1) == []
+        assert dag.predecessor_ids(task2) == ["one"]
+        dag_run = dag.run()
+        assert dag_run.get_result_for_task(task2) == 1
+
+    def test_reenter_dag(self):
+        # Given a dag used as context
+        with Dag(id="dag") as dag:
+            task1 = ReturnValueTask(id="one", value=1)
+            # When it is entered again
+            with dag:
+                task2 = ReturnValueTask(id="also_one", value=1, await_tasks=[task1])
+            task3 = ReturnValueTask(id="still_one", value=1, await_tasks=[task2])
+        # Then all tasks should be part of the dag, and the dag should be left as context afterward
+        assert list(dag.tasks()) == [task1, task2, task3]
+        with pytest.raises(IndexError):
+            DagContext.get_current_dag()
+
+    def test_literal_updated_between_runs(self):
+        # Given a task with a literal argument, that was run before
+        with Dag(id="dag") as dag:
+            task = ReturnValueTask(id="value", value=5)
+        first_run = dag.run()
+        # When the literal is updated, and the dag is run again
+        task.value = 9
+        second_run = dag.run()
+        # Then each run should have used the value at the time of that run
+        assert first_run.get_result_for_task(task) == 5
+        assert second_run.get_result_for_task(task) == 9
@@ -45,6 +45,13 @@ class TestTrigger:
                 == State.UPSTREAM_FAILED
             )
 
+        def test_generator(self):
+            states = [State.SUCCEEDED, State.SKIPPED]
+            assert (
+                Trigger.ALL_SUCCESS.next_state(state for state in states)
+                == State.UPSTREAM_SKIPPED
+            )
+
     class TestAllFailed:
         def test_all_failed(self):
             assert (
@@ -1,10 +1,48 @@
 import asyncio
 import logging
-import time
+import selectors
+from typing import Callable
 
 import pytest
 
-from ydag.task import Task, TaskArg, DagRun, State
+from ydag import task as task_module
+from ydag.task import Task, TaskArg, TaskResult, DagRun, State, ResultCache
+
+
+class VirtualTimeSelector(selectors.DefaultSelector):
+    """Selector that moves a virtual clock forward instead of blocking"""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout:
+            self.now += timeout
+        return events
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop in which sleeping takes no wall time, while keeping the order of timers"""
+
+    def __init__(self):
+        self._virtual_time_selector = VirtualTimeSelector()
+        super().__init__(self._virtual_time_selector)
+
+    def time(self) -> float:
+        return self._virtual_time_selector.now
+
+
+class VirtualTimeEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    def new_event_loop(self):
+        return VirtualTimeEventLoop()
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Run the async tests on virtual time, so waiting tasks do not slow down the test suite"""
+    return VirtualTimeEventLoopPolicy()
 
 
 class ReturnOneTask(Task[int]):
@@ -17,6 +55,11 @@ class ReturnTrueTask(Task[bool]):
         return True
 
 
+class ReturnFalseTask(Task[bool]):
+    async def run(self) -> bool:
+        return False
+
+
 class FailTask(Task[bool]):
     async def run(self) -> bool:
         raise ValueError("This task always fails")
@@ -51,15 +94,43 @@ class IncrementTask(Task[int]):
         return self.x
 
 
+class CountRunsTask(Task[int]):
+    def __init__(self, id: str, **kwargs):
+        super().__init__(id, **kwargs)
+        self.runs = 0
+
+    async def run(self) -> int:
+        self.runs += 1
+        return self.runs
+
+
+class PureCountRunsTask(CountRunsTask):
+    pure = True
+
+
+class CallTask(Task[int]):
+    def __init__(self, id: str, *, func: Callable[[], int], **kwargs):
+        super().__init__(id, **kwargs)
+        self.func = func
+
+    async def run(self, func: Callable[[], int]) -> int:
+        return func()
+
+
+class ReturnFuncTask(Task[Callable[[], int]]):
+    async def run(self) -> Callable[[], int]:
+        return lambda: 1
+
+
 class WaitTask(Task[None]):
     def __init__(self, id: str, delay: int):
         super().__init__(id)
         self.delay = delay
 
     async def run(self) -> None:
-        logging.debug(f"Waiting {self.delay} seconds")
+        logging.debug("Waiting %s seconds", self.delay)
         await asyncio.sleep(self.delay)
-        logging.debug(f"Waited {self.delay} seconds")
+        logging.debug("Waited %s seconds", self.delay)
 
 
 class TestTask:
@@ -67,7 +138,7 @@ class TestTask:
         # Given a task
         task = ReturnOneTask("one")
         # Then the task should have no dependencies
-        assert task.upstream_tasks == []
+        assert task.upstream_tasks == ()
 
     def test_single_upstream_task(self):
         # Given a task
@@ -75,7 +146,15 @@ class TestTask:
         # When a dependent task is created
         task2 = AddOneTask("two", x=task1)
         # Then the dependent task should have the correct dependencies
-        assert task2.upstream_tasks == [task1]
+        assert task2.upstream_tasks == (task1,)
+
+    def test_run_arg_sources(self):
+        # Given a task with one upstream task and one plain value as run args
+        task1 = ReturnOneTask("one")
+        task2 = AddTask("add", x=task1, y=2)
+        # Then only the upstream task arg should refer to its task
+        assert task2.run_arg_sources == (("x", task1), ("y", None))
+        assert task2.get_run_kwargs_before_execution() == {"x": task1, "y": 2}
 
     def test_wait_on_upstream(self):
         # Given a task
@@ -83,7 +162,23 @@ class TestTask:
         # When a dependent task is created via wait_on
         task2 = ReturnOneTask("also_one", wait_on=[task1])
         # Then the dependent task should have the correct dependencies
-        assert task2.upstream_tasks == [task1]
+        assert task2.upstream_tasks == (task1,)
+
+    def test_duplicate_upstream(self):
+        # Given a task
+        task1 = ReturnOneTask("one")
+        # When a dependent task references it both via wait_on and as argument
+        task2 = AddTask("two", x=task1, y=task1, wait_on=[task1])
+        # Then the dependent task should have it as dependency only once
+        assert task2.upstream_tasks == (task1,)
+
+    def test_chained_transform_upstream(self):
+        # Given a task
+        task1 = ReturnOneTask("one")
+        # When a chain of transformations is created
+        task2 = task1.transform(lambda x: x + 1).transform(lambda x: x * 2)
+        # Then the chain should be a single task directly on the original task
+        assert task2.upstream_tasks == (task1,)
 
     def test_skip_upstream(self):
         # Given a task
@@ -91,7 +186,7 @@ class TestTask:
         # When a dependent task is created via skip
         task2 = ReturnOneTask("one", skip=task1)
         # Then the dependent task should have the correct dependencies
-        assert task2.upstream_tasks == [task1]
+        assert task2.upstream_tasks == (task1,)
         # And the task shoudl have a skip task
         assert task2.has_skip_task
         # And the task should be the skip_task
@@ -101,62 +196,106 @@ class TestTask:
         # Given a task that should be skipped
         task2 = ReturnOneTask("one", skip=True)
         # Then the task should have the correct dependencies
-        assert task2.upstream_tasks == []
+        assert task2.upstream_tasks == ()
         # And the task should have no skip task
         assert not task2.has_skip_task
         # And therefore, there would be no reason to gather the skip task
         with pytest.raises(ValueError):
             task2.skip_task
+        # And the task should be known to be skipped without running it
+        assert task2.constant_result.state == State.SKIPPED
 
 
+@pytest.mark.asyncio(loop_scope="session")
 class TestDagRun:
-    def test_simple_dag_run(self):
+    async def test_simple_dag_run(self):
         # Given two tasks
         task1 = ReturnOneTask("one")
         task2 = AddOneTask("two", x=task1)
         # When the tasks are run
         run = DagRun()
-        asyncio.run(run.run(task2))
+        await run.run(task2)
         # Then the result should be correct
         assert run.get_result(task1).value == 1
         assert run.get_result(task2).value == 2
 
-    def test_simple_dag_run_with_transformation(self):
+    async def test_simple_dag_run_with_transformation(self):
         # Given two tasks
         task1 = ReturnOneTask("one")
         task2 = AddOneTask("four", x=task1.transform(lambda x: x + 1).transform(lambda x: x + 1))
         # When the tasks are run
         run = DagRun()
-        asyncio.run(run.run(task2))
+        await run.run(task2)
         # Then the result should be correct
         assert run.get_result(task1).value == 1
         assert run.get_result(task2).value == 4
 
-    def test_simple_skip(self):
+    async def test_shared_transform(self):
+        # Given a transformation that counts its calls, applied on the same task by several downstream tasks
+        calls = []
+
+        def count_calls(x: int) -> int:
+            calls.append(x)
+            return x + 1
+
+        task1 = ReturnOneTask("one")
+        task2a = AddOneTask("three", x=task1.transform(count_calls))
+        task2b = AddOneTask("also_three", x=task1.transform(count_calls))
+        task3 = AddTask("six", x=task2a, y=task2b)
+        # When the tasks are run
+        run = DagRun()
+        await run.run(task3)
+        # Then the result should be correct
+        assert run.get_result(task3).value == 6
+        # And the transformation should have been applied only once
+        assert calls == [1]
+
+    async def test_chained_transform_order(self):
+        # Given a chain of transformations that do not commute
+        task1 = ReturnOneTask("one")
+        task2 = task1.transform(lambda x: x + 1).transform(lambda x: x * 3)
+        # When the tasks are run
+        run = DagRun()
+        await run.run(task2)
+        # Then the transformations should be applied in order
+        assert run.get_result(task2).value == 6
+
+    async def test_long_transform_chain(self):
+        # Given a chain of more transformations than the recursion limit
+        task = ReturnOneTask("one")
+        for _ in range(2000):
+            task = task.transform(lambda x: x + 1)
+        # When the tasks are run
+        run = DagRun()
+        await run.run(task)
+        # Then all transformations should be applied
+        assert run.get_result(task).value == 2001
+
+    async def test_simple_skip(self):
         # Given two tasks where the upstream one must be skipped
         task1 = ReturnOneTask("one", skip=True)
         task2 = AddOneTask("two", x=task1)
         # When the tasks are run
         run = DagRun()
-        asyncio.run(run.run(task2))
+        await run.run(task2)
         # Then the tasks should be skipped
         assert run.get_result(task1).state == State.SKIPPED
         assert run.get_result(task2).state == State.UPSTREAM_SKIPPED
 
-    def test_dependent_skip_task(self):
+    async def test_dependent_skip_task(self):
         # Given three tasks where the second one must be skipped based on the first
         task1 = ReturnTrueTask("true")
         task2 = ReturnOneTask("one", skip=task1)
         task3 = AddOneTask("two", x=task2)
         # When the tasks are run
         run = DagRun()
-        asyncio.run(run.run(task3))
+        await run.run(task3)
         # Then the tasks should be skipped
         assert run.get_result(task1).value is True
         assert run.get_result(task2).state == State.SKIPPED
         assert run.get_result(task3).state == State.UPSTREAM_SKIPPED
 
-    def test_skip_first(self):
+    async def test_skip_first(self):
         # Given two tasks
         task1a = ReturnTrueTask("true")
         task1b = ReturnOneTask("one")
@@ -164,7 +303,7 @@ class TestDagRun:
         task2 = AddOneTask("two", x=task1b, skip=task1a, check_skip_first=True)
         # When the tasks are run
         run = DagRun()
-        asyncio.run(run.run(task2))
+        await run.run(task2)
         # Then the dependent task should not have run
         task2_result = run.get_result(task2)
         assert task2_result.state == State.SKIPPED
@@ -173,7 +312,33 @@ class TestDagRun:
         with pytest.raises(KeyError):
             run.get_result(task1b)
 
-    def test_single_execution(self):
+    async def test_skip_first_not_skipped(self):
+        # Given a task that should only be skipped after checking the skip task first
+        task1a = ReturnFalseTask("false")
+        task1b = ReturnOneTask("one")
+        task2 = AddOneTask("two", x=task1b, skip=task1a, check_skip_first=True)
+        # When the tasks are run
+        run = DagRun()
+        await run.run(task2)
+        # Then the skip task should not skip the dependent task
+        assert run.get_result(task1a).value is False
+        # And the upstream tasks should have run afterward
+        assert run.get_result(task1b).value == 1
+        assert run.get_result(task2).value == 2
+
+    async def test_result_not_completed(self):
+        # Given a task that takes some time to complete
+        task = WaitTask("wait", delay=1)
+        run = DagRun()
+        # When the task was started, but is not completed yet
+        started = asyncio.create_task(run.run(task))
+        await asyncio.sleep(0.5)
+        # Then there should be no result yet
+        with pytest.raises(KeyError):
+            run.get_result(task)
+        await started
+
+    async def test_single_execution(self):
         # Given a task with 2 downstream tasks
         task1 = IncrementTask("one")
         task2a = AddOneTask("two", x=task1)
@@ -181,19 +346,79 @@ class TestDagRun:
         task3 = AddTask("four", x=task2a, y=task2b)
         # When the tasks are run
         run = DagRun()
-        asyncio.run(run.run(task3))
+        await run.run(task3)
         # Then the first task should be run once
         assert run.get_result(task1).value == 1
         assert run.get_result(task3).value == 4
 
-    def test_failed_task(self):
+    @pytest.mark.parametrize("max_workers", [None, 1])
+    async def test_release_results(self, max_workers):
+        # Given a task with 2 downstream tasks
+        task1 = ReturnOneTask("one")
+        task2a = AddOneTask("two", x=task1)
+        task2b = AddOneTask("also_two", x=task1)
+        task3 = AddTask("four", x=task2a, y=task2b)
+        # When the tasks are run, releasing results that are no longer needed
+        run = DagRun(release_results=True, max_workers=max_workers)
+        await run.run(task3)
+        # Then the value of the task that was run should be kept
+        assert run.get_result(task3).value == 4
+        # And the results of the upstream tasks should be dropped
+        for task in [task1, task2a, task2b]:
+            with pytest.raises(KeyError):
+                run.get_result(task)
+
+    async def test_release_results_sequential_runs(self):
+        # Given two tasks with a shared upstream task
+        task1 = CountRunsTask("count")
+        task2a = AddOneTask("two", x=task1)
+        task2b = AddOneTask("three", x=task1)
+        # When they are run one after another, releasing results that are no longer needed
+        run = DagRun(release_results=True)
+        await run.run(task2a)
+        await run.run(task2b)
+        # Then both should have succeeded, the upstream task having run again for its released value
+        assert run.get_result(task2a).value == 2
+        assert run.get_result(task2b).value == 3
+        assert task1.runs == 2
+
+    async def test_release_results_concurrent_runs(self):
+        # Given two tasks with a shared upstream task, of which one also waits on a slower task
+        task1 = CountRunsTask("count")
+        task2a = AddOneTask("two", x=task1)
+        task2b = AddOneTask("also_two", x=task1, wait_on=[WaitTask("wait", delay=1)])
+        # When they are run concurrently, releasing results that are no longer needed
+        run = DagRun(release_results=True)
+        await asyncio.gather(run.run(task2a), run.run(task2b))
+        # Then both should have used the value of the single run of the upstream task
+        assert run.get_result(task2a).value == 2
+        assert run.get_result(task2b).value == 2
+        assert task1.runs == 1
+        # And the result of the upstream task should be dropped afterward
+        with pytest.raises(KeyError):
+            run.get_result(task1)
+
+    async def test_concurrent_runs_share_upstream(self):
+        # Given two tasks with a shared upstream task
+        task1 = CountRunsTask("count")
+        task2a = AddOneTask("two", x=task1)
+        task2b = AddOneTask("also_two", x=task1)
+        # When both tasks are run concurrently
+        run = DagRun()
+        await asyncio.gather(run.run(task2a), run.run(task2b))
+        # Then the upstream task should have run once
+        assert task1.runs == 1
+        assert run.get_result(task2a).value == 2
+        assert run.get_result(task2b).value == 2
+
+    async def test_failed_task(self):
         # Given a task that always fails
         task1 = FailTask("fail")
         # And a task that depends on the failed task
         task2 = AddOneTask("will_not_start", x=task1)
         # When the task is run
         run = DagRun()
-        asyncio.run(run.run(task2))
+        await run.run(task2)
         # Then the first task's result should be correct
         task1_result = run.get_result(task1)
         assert task1_result.state == State.FAILED
@@ -205,14 +430,14 @@ class TestDagRun:
         assert task2_result.error is None
         assert task2_result.value is None
 
-    def test_failed_skip(self):
+    async def test_failed_skip(self):
         # Given a task that always fails
         task1 = FailTask("fail")
         # And a task that depends via skip on the failed task
         task2 = ReturnOneTask("will_not_start", skip=task1)
         # When the task is run
         run = DagRun()
-        asyncio.run(run.run(task2))
+        await run.run(task2)
         # Then the first task's result should be correct
         task1_result = run.get_result(task1)
         assert task1_result.state == State.FAILED
@@ -224,34 +449,248 @@ class TestDagRun:
         assert task2_result.error is None
         assert task2_result.value is None
 
-    @pytest.mark.asyncio
+    async def test_failed_before_skipped(self):
+        # Given a task that is skipped, and a task that always fails
+        task1a = ReturnOneTask("skipped", skip=True)
+        task1b = FailTask("fail")
+        # And a task that depends on both, the skipped one first
+        task2 = AddTask("will_not_start", x=task1a, y=task1b)
+        # When the task is run
+        run = DagRun()
+        await run.run(task2)
+        # Then the upstream failure should take precedence over the skip
+        assert run.get_result(task2).state == State.UPSTREAM_FAILED
+
     async def test_run_task_twice(self):
         # Given a task
         task = WaitTask("wait", delay=1)
         # When the task is run twice
         run = DagRun()
         await run.run(task)
-        tic = time.time()
+        loop = asyncio.get_running_loop()
+        tic = loop.time()
         await run.run(task)
-        toc = time.time()
+        toc = loop.time()
         # Then the result should be correct
         assert run.get_result(task).value is None
         # And the execution should be done immediately
         assert toc - tic < 0.1
 
-    @pytest.mark.asyncio
     async def test_task_already_started(self):
         # Given a task that will take some time to complete
         task = WaitTask("wait", delay=1)
         run = DagRun()
         # When the task is run twice concurrently, giving the first one some head start
-        tic = time.time()
+        loop = asyncio.get_running_loop()
+        tic = loop.time()
         result1 = asyncio.create_task(run.run(task))
         await asyncio.sleep(0.9)
         result2 = asyncio.create_task(run.run(task))
         await asyncio.gather(result1, result2)
-        toc = time.time()
+        toc = loop.time()
         # Then all should result as normal
         assert run.get_result(task).value is None
         # And execution should be done as soon as that first one was done
         assert toc - tic < 1.4
+
+    async def test_max_workers(self):
+        # Given 3 tasks that take some time to complete, and a task waiting on all of them
+        task1s = [WaitTask(f"wait_{i}", delay=1) for i in range(3)]
+        task2 = ReturnOneTask("one", wait_on=task1s)
+        # When the task is run with only 2 workers
+        run = DagRun(max_workers=2)
+        loop = asyncio.get_running_loop()
+        tic = loop.time()
+        await run.run(task2)
+        toc = loop.time()
+        # Then the result should be correct
+        assert run.get_result(task2).value == 1
+        # And no more than 2 waiting tasks should have run at the same time
+        assert 1.9 < toc - tic < 2.1
+
+    async def test_max_workers_check_skip_first(self):
+        # Given a task that checks its skip task first, and waits on 4 tasks that take some time to complete
+        task1s = [WaitTask(f"wait_{i}", delay=1) for i in range(4)]
+        task2 = ReturnOneTask("one", wait_on=task1s, skip=ReturnFalseTask("false"), check_skip_first=True)
+        # When the task is run with only 1 worker
+        run = DagRun(max_workers=1)
+        loop = asyncio.get_running_loop()
+        tic = loop.time()
+        await run.run(task2)
+        toc = loop.time()
+        # Then the result should be correct
+        assert run.get_result(task2).value == 1
+        # And the waiting tasks should have run one after another
+        assert 3.9 < toc - tic < 4.1
+
+    async def test_invalid_max_workers(self):
+        # When a dag run is created without any workers
+        # Then it should fail
+        with pytest.raises(ValueError):
+            DagRun(max_workers=0)
+
+    async def test_pure_task(self):
+        # Given a pure task without upstream tasks
+        task1 = PureCountRunsTask("count")
+        # When it is run in two dag runs
+        await DagRun().run(task1)
+        run = DagRun()
+        await run.run(task1)
+        # Then the task should have run only once
+        assert task1.runs == 1
+        assert run.get_result(task1).value == 1
+
+    async def test_pure_task_with_upstream(self):
+        # Given a pure task with an upstream task
+        task1 = PureCountRunsTask("count", wait_on=[ReturnOneTask("one")])
+        # When it is run in two dag runs
+        await DagRun().run(task1)
+        await DagRun().run(task1)
+        # Then the task should have run every time
+        assert task1.runs == 2
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestResultCache:
+    async def test_cached_across_dag_runs(self):
+        # Given a task that counts its runs
+        task = CountRunsTask("count")
+        # When it is run in two dag runs that share a cache
+        cache = ResultCache()
+        await DagRun(cache=cache).run(task)
+        run = DagRun(cache=cache)
+        await run.run(task)
+        # Then the second dag run should reuse the result of the first
+        assert run.get_result(task).value == 1
+        assert task.runs == 1
+
+    async def test_memoize_disabled(self):
+        # Given a task that may not be memoized
+        task = CountRunsTask("count", memoize=False)
+        # When it is run in two dag runs that share a cache
+        cache = ResultCache()
+        await DagRun(cache=cache).run(task)
+        run = DagRun(cache=cache)
+        await run.run(task)
+        # Then the task should have run twice
+        assert run.get_result(task).value == 2
+
+    async def test_different_inputs(self):
+        # Given two tasks with the same id, but different inputs
+        task_a = AddOneTask("add", x=1)
+        task_b = AddOneTask("add", x=2)
+        # When both are run with a shared cache
+        cache = ResultCache()
+        run_a = DagRun(cache=cache)
+        await run_a.run(task_a)
+        run_b = DagRun(cache=cache)
+        await run_b.run(task_b)
+        # Then the results should not be mixed up
+        assert run_a.get_result(task_a).value == 2
+        assert run_b.get_result(task_b).value == 3
+
+    async def test_unpicklable_inputs(self):
+        # Given a task with an input that cannot be hashed
+        task = CallTask("call", func=lambda: 1)
+        # When it is run with a cache
+        cache = ResultCache()
+        run = DagRun(cache=cache)
+        await run.run(task)
+        # Then it should run as normal, without being cached
+        assert run.get_result(task).value == 1
+        assert ResultCache.key(task, [task.func]) is None
+
+    async def test_persisted_cache(self, tmp_path):
+        # Given a task that counts its runs
+        task = CountRunsTask("count")
+        path = str(tmp_path / "cache.pickle")
+        # When it is run with a cache that is persisted to disk
+        await DagRun(cache=ResultCache(path)).run(task)
+        # And run again with a cache loaded from that file
+        run = DagRun(cache=ResultCache(path))
+        await run.run(task)
+        # Then the result should be taken from the file
+        assert run.get_result(task).value == 1
+        assert task.runs == 1
+        # And no temporary file should be left behind
+        assert [p.name for p in tmp_path.iterdir()] == ["cache.pickle"]
+
+    async def test_persisted_cache_unpicklable_result(self, tmp_path):
+        # Given a task with a result that cannot be pickled
+        task = ReturnFuncTask("func")
+        path = str(tmp_path / "cache.pickle")
+        cache = ResultCache(path)
+        # When it is run with a cache that is persisted to disk
+        run = DagRun(cache=cache)
+        await run.run(task)
+        # Then it should run as normal, without being cached
+        assert run.get_result(task).value() == 1
+        # And an unrelated task should still be cached afterward
+        count_task = CountRunsTask("count")
+        await DagRun(cache=cache).run(count_task)
+        await DagRun(cache=ResultCache(path)).run(count_task)
+        assert count_task.runs == 1
+        # And no temporary file should be left behind
+        assert [p.name for p in tmp_path.iterdir()] == ["cache.pickle"]
+
+    async def test_failed_save(self, tmp_path):
+        # Given a persisted cache with a new result
+        path = tmp_path / "cache.pickle"
+        cache = ResultCache(str(path))
+        cache.put(("one", "digest"), TaskResult(value=1, state=State.SUCCEEDED))
+        # When saving fails
+        path.mkdir()
+        with pytest.raises(OSError):
+            cache.save()
+        # Then no temporary file should be left behind
+        assert [p.name for p in tmp_path.iterdir()] == ["cache.pickle"]
+
+    async def test_failed_save_after_failed_run(self, tmp_path):
+        # Given a task that takes some time to complete, run with a persisted cache that cannot be saved
+        task = WaitTask("wait", delay=1)
+        path = tmp_path / "cache.pickle"
+        cache = ResultCache(str(path))
+        cache.put(("one", "digest"), TaskResult(value=1, state=State.SUCCEEDED))
+        run = DagRun(cache=cache)
+        path.mkdir()
+        # When the run is cancelled
+        started = asyncio.create_task(run.run(task))
+        await asyncio.sleep(0.5)
+        started.cancel()
+        # Then the cancellation should not be hidden by the failed save
+        with pytest.raises(asyncio.CancelledError):
+            await started
+
+    async def test_transform_not_memoized(self):
+        # Given a transformation that counts its calls
+        calls = []
+
+        def count_calls(x: int) -> int:
+            calls.append(x)
+            return x + 1
+
+        task = ReturnOneTask("one").transform(count_calls)
+        # When it is run in two dag runs that share a cache
+        cache = ResultCache()
+        await DagRun(cache=cache).run(task)
+        run = DagRun(cache=cache)
+        await run.run(task)
+        # Then the transformation should not be taken from the cache, as its id does not identify the function
+        assert not task.memoize
+        assert run.get_result(task).value == 2
+        assert calls == [1, 1]
+
+    async def test_inherited_run_changes_key(self, monkeypatch):
+        # Given a task class that inherits run()
+        task = PureCountRunsTask("count")
+        key = ResultCache.key(task, [])
+        # When the source of the base class changes
+        get_source = task_module.inspect.getsource
+        monkeypatch.setattr(
+            task_module.inspect, "getsource",
+            lambda cls: get_source(cls) + "# changed" if cls is CountRunsTask else get_source(cls))
+        task_module._class_digest.cache_clear()
+        changed_key = ResultCache.key(task, [])
+        task_module._class_digest.cache_clear()
+        # Then the cache key should change
+        assert changed_key != key
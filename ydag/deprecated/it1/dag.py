@@ -1,17 +1,25 @@
 import asyncio
+import functools
 import inspect
 import logging
 import uuid
 from abc import ABC, abstractmethod
-from collections import deque
+from contextvars import ContextVar, Token
 from dataclasses import dataclass
-from typing import Any
-from typing import List, Dict, Generic, TypeVar, Callable
-
-import networkx as nx
+from graphlib import TopologicalSorter
+from typing import Any, Awaitable
+from typing import List, Dict, Generic, TypeVar, Callable, Tuple, ValuesView
 
 from ydag.deprecated.it1.trigger import Trigger, State
 
+try:
+    # Optional, faster event loop
+    import uvloop
+
+    _new_event_loop = uvloop.new_event_loop
+except ImportError:
+    _new_event_loop = asyncio.new_event_loop
+
 
 class DagFailedError(RuntimeError):
     pass
@@ -25,6 +33,10 @@ class DagDefinitionError(RuntimeError):
     pass
 
 
+# Innermost DAG used as context manager; a ContextVar keeps concurrent DAG definitions apart
+_current_dag: ContextVar["Dag | None"] = ContextVar("_current_dag", default=None)
+
+
 class DagContext:
     """
     DAG context is used to keep the current DAG when DAG is used as ContextManager.
@@ -41,24 +53,23 @@ class DagContext:
 
     """
 
-    _context_managed_dags: deque["Dag"] = deque()
-
     @classmethod
-    def push_context_managed_dag(cls, dag: "Dag"):
-        cls._context_managed_dags.appendleft(dag)
+    def push_context_managed_dag(cls, dag: "Dag") -> Token["Dag | None"]:
+        return _current_dag.set(dag)
 
     @classmethod
-    def pop_context_managed_dag(cls) -> "Dag | None":
-        dag = cls._context_managed_dags.popleft()
+    def pop_context_managed_dag(cls, token: Token["Dag | None"]) -> "Dag | None":
+        dag = _current_dag.get()
+        _current_dag.reset(token)
         return dag
 
     @classmethod
     def get_current_dag(cls) -> "Dag":
-        try:
-            return cls._context_managed_dags[0]
-        except IndexError as e:
+        dag = _current_dag.get()
+        if dag is None:
             logging.error("No DAG defined")
-            raise e
+            raise IndexError("No DAG defined")
+        return dag
 
 
 U = TypeVar("U")
@@ -66,6 +77,17 @@ InputType = TypeVar("InputType")
 OutputType = TypeVar("OutputType")
 
 
+@functools.lru_cache(maxsize=None)
+def _run_arg_names(run_fn: Callable[..., Any]) -> Tuple[str, ...]:
+    """Names of the arguments of an (unbound) run method, besides self; inspected once per Task subclass"""
+    return tuple(inspect.getfullargspec(run_fn).args[1:])
+
+
+def _identity(x: Any) -> Any:
+    """Default transformation; recognised by identity, so gather_kwargs_and_run can skip calling it"""
+    return x
+
+
 class TaskException(RuntimeError):
     pass
 
@@ -74,7 +96,7 @@ class TaskResultError(RuntimeError):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskResult(Generic[OutputType]):
     task: "Task[Any]"
     transformation: Callable[[Any], OutputType]
@@ -96,6 +118,7 @@ class Task(ABC, Generic[OutputType]):
         self.soft_fail = soft_fail
         self.trigger = trigger
         self.results: List[TaskResult] = []
+        self._runner: Callable[["DagRun"], Awaitable[OutputType]] | None = None
         for task in await_tasks or []:
             task >> self
 
@@ -106,26 +129,40 @@ class Task(ABC, Generic[OutputType]):
         * Gets value for task attrs of same name(s)
         * If value is instance of TaskResult, gather task result from correct task instance in dag run
         """
-        arg_names = inspect.getfullargspec(self.run)[0]
-        if len(arg_names) == 1:
-            kwargs = {}
-        else:
-            arg_names = arg_names[1:]  # Remove 'self'
-            task_attributes = {arg: getattr(self, arg) for arg in arg_names}
-            kwargs = {
-                arg: (
-                    attr.transformation(dag_run.get_result_for_task(attr.task))
-                    if isinstance(attr, TaskResult)
-                    else (
-                        attr.transformation(dag_run.input)
-                        if isinstance(attr, DagInput)
-                        else attr
-                    )
+        if self._runner is None:
+            self._runner = self._compile_runner()
+        return await self._runner(dag_run)
+
+    def _compile_runner(self) -> Callable[["DagRun"], Awaitable[OutputType]]:
+        """
+        Specialise gathering the kwargs for this task, once; the runner is reused for every dag run.
+        Attrs are classified up front; literal attrs are still read per run, so tasks may update them between runs.
+        """
+        literals: List[str] = []
+        upstream_results: List[Tuple[str, Callable[[Any], Any], Task]] = []
+        dag_inputs: List[Tuple[str, Callable[[Any], Any]]] = []
+        for arg in _run_arg_names(type(self).run):
+            attr = getattr(self, arg)
+            if isinstance(attr, TaskResult):
+                upstream_results.append((arg, attr.transformation, attr.task))
+            elif isinstance(attr, DagInput):
+                dag_inputs.append((arg, attr.transformation))
+            else:
+                literals.append(arg)
+        run = self.run
+
+        async def runner(dag_run: "DagRun") -> OutputType:
+            kwargs = {arg: getattr(self, arg) for arg in literals}
+            for arg, transformation, task in upstream_results:
+                result = dag_run.get_result_for_task(task)
+                kwargs[arg] = result if transformation is _identity else transformation(result)
+            for arg, transformation in dag_inputs:
+                kwargs[arg] = (
+                    dag_run.input if transformation is _identity else transformation(dag_run.input)
                 )
-                for arg, attr in task_attributes.items()
-            }
-        res = await self.run(**kwargs)
-        return res
+            return await run(**kwargs)
+
+        return runner
 
     @abstractmethod
     async def run(self, **kwargs) -> OutputType:
@@ -142,11 +179,7 @@ class Task(ABC, Generic[OutputType]):
 
     def result(self) -> TaskResult[OutputType]:
         """Create future result to be used by downstream task"""
-
-        def func(x: OutputType) -> OutputType:
-            return x
-
-        return self.transform(func)
+        return self.transform(_identity)
 
     def transform(self, transformation: Callable[[OutputType], U]) -> TaskResult[U]:
         """"""
@@ -164,13 +197,16 @@ class TaskInstance(Generic[OutputType]):
     ):
         self.task: Task = task
         self.dag_run = dag_run
-        self._log = logging.getLogger(__name__ + f" {dag_run.run_id} {task.id}")
         self._state = State.CREATED
-        self._async_task: asyncio.tasks.Task[OutputType | None] = asyncio.create_task(
-            self._execute()
-        )
+        self._async_task: asyncio.tasks.Task[OutputType | None] | None = None
         self._result: OutputType | None = None
         self._error: RuntimeError | None = None
+        self._predecessors: List[TaskInstance] = []
+
+    @functools.cached_property
+    def _log(self) -> logging.Logger:
+        """Created on first use only"""
+        return logging.getLogger(f"{__name__} {self.dag_run.run_id} {self.task.id}")
 
     def __str__(self):
         return str(
@@ -189,11 +225,11 @@ class TaskInstance(Generic[OutputType]):
 
     def _next_state(self):
         """Determine next action (state) for this TaskRun, depending on its predecessors' states"""
-        predecessor_task_run_states = self.dag_run.get_predecessor_task_instance_states(
-            self
-        )
-        if predecessor_task_run_states:
-            next_state = self.task.trigger.next_state(predecessor_task_run_states)
+        if self._predecessors:
+            # Folded by the trigger while iterating; no intermediate list
+            next_state = self.task.trigger.next_state(
+                ti.state for ti in self._predecessors
+            )
         else:
             # No predecessors; trunk task
             next_state = State.RUNNING
@@ -219,93 +255,112 @@ class TaskInstance(Generic[OutputType]):
         return self._error
 
     @property
-    def async_task(self):
+    def async_task(self) -> asyncio.tasks.Task[OutputType | None] | None:
+        """None until the dag run starts this task instance; stays None if the task does not run"""
+        return self._async_task
+
+    def start(self) -> asyncio.tasks.Task[OutputType | None]:
+        """Schedule running the task; only call once its trigger has resolved to RUNNING"""
+        self._async_task = asyncio.create_task(self._execute())
         return self._async_task
 
     async def run_and_save(self) -> OutputType:
+        semaphore = self.dag_run._semaphore
         try:
-            return await self.task.gather_kwargs_and_run(self.dag_run)
+            if semaphore is None:
+                return await self.task.gather_kwargs_and_run(self.dag_run)
+            async with semaphore:
+                return await self.task.gather_kwargs_and_run(self.dag_run)
         except Exception as e:
             raise TaskFailedError(f"Task {self.task.id} failed", e)
 
     async def _execute(self) -> OutputType | None:
-        self._log.debug(f"Waiting task {self.task.id}")
-        self._state = State.WAITING
-
-        while self._next_state() == State.WAITING:
-            await asyncio.sleep(0.1)
-        next_state = self._next_state()
-
-        if next_state == State.UPSTREAM_FAILED:
-            self._log.debug(f"Failing task {self.task.id} due to upstream")
-            self._state = State.UPSTREAM_FAILED
-
-        elif next_state == State.RUNNING:
-            self._log.debug(f"Starting task {self.task.id}")
-            self._state = State.RUNNING
-            try:
-                self._result = await self.run_and_save()
-                self._log.debug(f"Completed task {self.task.id}")
-                self._state = State.SUCCEEDED
-                return self._result
-            except RuntimeError as e:
-                self._error = e
-                if self.task.soft_fail:
-                    self._log.warning(f"Failed. Skipping task {self.task.id}")
-                    self._state = State.SKIPPED
-                else:
-                    self._log.warning(f"Failed task {self.task.id}")
-                    self._state = State.FAILED
-
-        else:
-            raise NotImplementedError(
-                f"Not sure which state to use; next state for {self.task.id} was {next_state}"
-            )
-
+        """Run the task; the dag run has already decided from the trigger that it should"""
+        self._log.debug("Starting task %s", self.task.id)
+        self._state = State.RUNNING
+        try:
+            self._result = await self.run_and_save()
+            self._log.debug("Completed task %s", self.task.id)
+            self._state = State.SUCCEEDED
+            return self._result
+        except RuntimeError as e:
+            self._error = e
+            if self.task.soft_fail:
+                self._log.warning("Failed. Skipping task %s", self.task.id)
+                self._state = State.SKIPPED
+            else:
+                self._log.warning("Failed task %s", self.task.id)
+                self._state = State.FAILED
         return None
 
 
-@dataclass
+@dataclass(slots=True)
 class DagInput(Generic[InputType]):
-    transformation: Callable[[InputType], Any] = lambda x: x
+    transformation: Callable[[InputType], Any] = _identity
 
 
 class Dag(Generic[InputType]):
     def __init__(self, *, id: str):
         self.id: str = id
-        self._graph = nx.DiGraph()
+        self._tasks: Dict[str, Task] = {}
+        # Adjacency lists by task id
+        self._succ: Dict[str, List[str]] = {}
+        self._pred: Dict[str, List[str]] = {}
+        # One per (nested) with block, so the same dag can be entered again
+        self._context_tokens: List[Token["Dag | None"]] = []
 
     def input(
-        self, transform: Callable[[InputType], Any] = lambda x: x
+        self, transform: Callable[[InputType], Any] = _identity
     ) -> DagInput[InputType]:
         return DagInput[InputType](transform)
 
     def add(self, task: Task):
-        self._graph.add_node(task.id, task=task)
+        self._tasks[task.id] = task
+        self._succ.setdefault(task.id, [])
+        self._pred.setdefault(task.id, [])
 
     def add_dependency(self, first_task: Task, second_task):
-        self._graph.add_edge(first_task.id, second_task.id)
-        if not nx.is_directed_acyclic_graph(self._graph):
+        if second_task.id in self._succ[first_task.id]:
+            return
+        if self._would_create_cycle(first_task.id, second_task.id):
             raise DagDefinitionError(
                 f"Cannot create dependency between {first_task.id} and {second_task.id}; {self.id} is not longer a DAG"
             )
+        self._succ[first_task.id].append(second_task.id)
+        self._pred[second_task.id].append(first_task.id)
+
+    def _would_create_cycle(self, src: str, dst: str) -> bool:
+        """Whether an edge src -> dst would close a cycle, i.e. whether src is already reachable from dst"""
+        if src == dst:
+            return True
+        succ = self._succ
+        stack = [dst]
+        seen = {dst}
+        while stack:
+            for task_id in succ[stack.pop()]:
+                if task_id == src:
+                    return True
+                if task_id not in seen:
+                    seen.add(task_id)
+                    stack.append(task_id)
+        return False
 
     def predecessor_ids(self, task: Task) -> List[str]:
-        return self._graph.predecessors(task.id)
+        return self._pred[task.id]
 
-    def tasks(self) -> List[Task]:
-        return [node[1]["task"] for node in self._graph.nodes.data()]
+    def tasks(self) -> ValuesView[Task]:
+        return self._tasks.values()
 
-    def run(self, input: InputType | None = None):
-        dag_run = DagRun(dag=self, input=input)
+    def run(self, input: InputType | None = None, max_concurrency: int | None = None):
+        dag_run = DagRun(dag=self, input=input, max_concurrency=max_concurrency)
         return dag_run
 
     def __enter__(self):
-        DagContext.push_context_managed_dag(self)
+        self._context_tokens.append(DagContext.push_context_managed_dag(self))
         return self
 
     def __exit__(self, _type, _value, _tb):
-        DagContext.pop_context_managed_dag()
+        DagContext.pop_context_managed_dag(self._context_tokens.pop())
 
 
 class DagRun(Generic[InputType]):
@@ -314,19 +369,25 @@ class DagRun(Generic[InputType]):
         *,
         dag: Dag,
         input: InputType,
+        max_concurrency: int | None = None,
     ):
         self._run_id = uuid.uuid4()
-        self._log = logging.getLogger(__name__ + f" {self.run_id}")
         self._dag: Dag = dag
         self._input = input
         self._state = State.CREATED
         self._task_instances: Dict[str, TaskInstance] = {}
-        asyncio.run(self._execute())
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._run()
 
     @property
     def run_id(self):
         return self._run_id
 
+    @functools.cached_property
+    def _log(self) -> logging.Logger:
+        """Created on first use only"""
+        return logging.getLogger(f"{__name__} {self.run_id}")
+
     @property
     def dag(self):
         return self._dag
@@ -335,25 +396,73 @@ class DagRun(Generic[InputType]):
     def input(self):
         return self._input
 
+    def _run(self) -> None:
+        """
+        Run the dag to completion on a fresh event loop; a uvloop one if that is installed.
+        Where available, tasks are started eagerly, so tasks that can complete without suspending skip the scheduler.
+        """
+        with asyncio.Runner(loop_factory=_new_event_loop) as runner:
+            if hasattr(asyncio, "eager_task_factory"):  # Python >= 3.12
+                runner.get_loop().set_task_factory(asyncio.eager_task_factory)
+            runner.run(self._execute())
+
     async def _execute(self) -> None:
-        self._log.info(f"Starting dag {self._dag.id}")
+        self._log.info("Starting dag %s", self._dag.id)
         self.state = State.RUNNING
         self.task_instances: Dict[str, TaskInstance] = {
             task.id: TaskInstance(task=task, dag_run=self) for task in self._dag.tasks()
         }
-        await asyncio.gather(*[ti.async_task for ti in self.task_instances.values()])
-        self._log.info(f"Completed dag {self._dag.id}")
+        for ti in self.task_instances.values():
+            ti._predecessors = [
+                self.task_instances[predecessor_id]
+                for predecessor_id in self._dag.predecessor_ids(ti.task)
+            ]
+        await self._drive()
+        self._log.info("Completed dag %s", self._dag.id)
         self.state = State.SUCCEEDED
 
-    def get_predecessor_task_instance_states(self, task_run) -> List[State]:
-        """Get list of states of all predecessors of the given TaskInstance"""
-        predecessor_task_ids = self._dag.predecessor_ids(task_run.task)
-        predecessor_task_run_states = [
-            ti.state
-            for ti in self.task_instances.values()
-            if ti.task.id in predecessor_task_ids
-        ]
-        return predecessor_task_run_states
+    async def _drive(self) -> None:
+        """
+        Single scheduling loop for the whole dag run.
+        Once all predecessors of a task have completed, its trigger decides its next state here;
+        only tasks that actually run get an asyncio task.
+        """
+        sorter = TopologicalSorter(self._dag._pred)
+        sorter.prepare()
+        running: Dict[asyncio.Task, TaskInstance] = {}
+        try:
+            while sorter.is_active():
+                # Tasks that do not run are done at once, and may make their successors ready; settle those
+                # before awaiting, so they do not wait for an unrelated running task
+                while ready := sorter.get_ready():
+                    for task_id in ready:
+                        ti = self.task_instances[task_id]
+                        next_state = ti._next_state()
+                        if next_state == State.RUNNING:
+                            running[ti.start()] = ti
+                            continue
+
+                        if next_state == State.UPSTREAM_FAILED:
+                            ti._log.debug("Failing task %s due to upstream", task_id)
+                        elif next_state == State.UPSTREAM_SKIPPED:
+                            ti._log.debug("Skipping task %s due to upstream", task_id)
+                        else:
+                            raise NotImplementedError(
+                                f"Not sure which state to use; next state for {task_id} was {next_state}"
+                            )
+                        ti._state = next_state
+                        sorter.done(task_id)
+
+                if not running:
+                    continue
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for async_task in done:
+                    async_task.result()  # Unexpected errors abort the dag run
+                    sorter.done(running.pop(async_task).task.id)
+        finally:
+            # Only non-empty when aborting
+            for async_task in running:
+                async_task.cancel()
 
     def get_result_for_task(self, task: Task[OutputType]) -> OutputType:
         res = self.task_instances[task.id].result
@@ -1,31 +1,38 @@
-from enum import Enum
-from typing import List
+from enum import Enum, IntFlag
+from typing import Callable, Dict, Iterable
 
 
-class State(Enum):
-    CREATED = 0
-    WAITING = (1,)
-    RUNNING = (2,)
-    SKIPPED = (3,)
-    SUCCEEDED = (4,)
-    FAILED = (5,)
-    UPSTREAM_FAILED = (6,)
-    UPSTREAM_SKIPPED = (7,)
+class State(IntFlag):
+    """One bit per state, so groups of states are masks"""
+
+    CREATED = 1
+    WAITING = 2
+    RUNNING = 4
+    SKIPPED = 8
+    SUCCEEDED = 16
+    FAILED = 32
+    UPSTREAM_FAILED = 64
+    UPSTREAM_SKIPPED = 128
 
     def __str__(self):
         return self.name
 
 
-NOT_DONE_STATES = {State.CREATED, State.WAITING, State.RUNNING}
-DONE_STATES = {
-    State.SKIPPED,
-    State.UPSTREAM_SKIPPED,
-    State.SUCCEEDED,
-    State.FAILED,
-    State.UPSTREAM_FAILED,
-}
-SKIPPED_STATES = {State.SKIPPED, State.UPSTREAM_SKIPPED}
-FAILED_STATES = {State.FAILED, State.UPSTREAM_FAILED}
+# Plain ints; IntFlag's own bitwise operators are much slower than int arithmetic
+NOT_DONE_MASK = int(State.CREATED | State.WAITING | State.RUNNING)
+DONE_MASK = int(
+    State.SKIPPED
+    | State.UPSTREAM_SKIPPED
+    | State.SUCCEEDED
+    | State.FAILED
+    | State.UPSTREAM_FAILED
+)
+SKIPPED_MASK = int(State.SKIPPED | State.UPSTREAM_SKIPPED)
+FAILED_MASK = int(State.FAILED | State.UPSTREAM_FAILED)
+SUCCEEDED_MASK = int(State.SUCCEEDED)
+
+# Folding goes through this lookup for the same reason; IntFlag hashes like int
+STATE_BIT = {state: int(state) for state in State}
 
 
 class Trigger(Enum):
@@ -47,51 +54,77 @@ class Trigger(Enum):
     NONE_FAILED = "none_failed"
     NONE_SKIPPED = "none_skipped"
 
-    def next_state(self, predecessor_states: List[State]) -> State:
-        if any([state in NOT_DONE_STATES for state in predecessor_states]):
+    def next_state(self, predecessor_states: Iterable[State]) -> State:
+        """
+        Determine the next state of a task from the states of its predecessors (any iterable, consumed once)
+        """
+        mask = 0
+        for state in predecessor_states:
+            mask |= STATE_BIT[state]
+
+        if mask & NOT_DONE_MASK:
             return State.WAITING
 
-        if self == Trigger.ALL_SUCCESS:
-            if set(predecessor_states) == {State.SUCCEEDED}:
-                return State.RUNNING
-            if any([state in SKIPPED_STATES for state in predecessor_states]):
-                return State.UPSTREAM_SKIPPED
-            if any([state in FAILED_STATES for state in predecessor_states]):
-                return State.UPSTREAM_FAILED
-
-        if self == Trigger.ALL_FAILED:
-            if set(predecessor_states).issubset(FAILED_STATES):
-                return State.RUNNING
-            if any([state in SKIPPED_STATES for state in predecessor_states]):
-                return State.UPSTREAM_SKIPPED
-            if any([state in FAILED_STATES for state in predecessor_states]):
-                return State.UPSTREAM_FAILED
-
-        if self == Trigger.ALL_DONE:
-            if set(predecessor_states).issubset(DONE_STATES):
-                return State.RUNNING
-            return State.FAILED
-
-        if self == Trigger.ONE_SUCCESS:
-            if any([state == State.SUCCEEDED for state in predecessor_states]):
-                return State.RUNNING
-            if not any([state in FAILED_STATES for state in predecessor_states]):
-                return State.UPSTREAM_FAILED
-            return State.FAILED
-
-        if self == Trigger.ONE_FAILED:
-            if not any([state in FAILED_STATES for state in predecessor_states]):
-                return State.RUNNING
-            return State.FAILED
-
-        if self == Trigger.NONE_FAILED:
-            if any([state in FAILED_STATES for state in predecessor_states]):
-                return State.FAILED
-            return State.RUNNING
-
-        if self == Trigger.NONE_SKIPPED:
-            if any([state in SKIPPED_STATES for state in predecessor_states]):
-                return State.FAILED
-            return State.RUNNING
-
-        return State.WAITING
+        return _TRIGGER_TABLE[self](mask)
+
+
+def _all_success(mask: int) -> State:
+    if mask == SUCCEEDED_MASK:
+        return State.RUNNING
+    if mask & SKIPPED_MASK:
+        return State.UPSTREAM_SKIPPED
+    if mask & FAILED_MASK:
+        return State.UPSTREAM_FAILED
+    return State.WAITING
+
+
+def _all_failed(mask: int) -> State:
+    if not mask & ~FAILED_MASK:
+        return State.RUNNING
+    if mask & SKIPPED_MASK:
+        return State.UPSTREAM_SKIPPED
+    if mask & FAILED_MASK:
+        return State.UPSTREAM_FAILED
+    return State.WAITING
+
+
+def _all_done(mask: int) -> State:
+    return State.RUNNING
+
+
+def _one_success(mask: int) -> State:
+    if mask & SUCCEEDED_MASK:
+        return State.RUNNING
+    if not mask & FAILED_MASK:
+        return State.UPSTREAM_FAILED
+    return State.FAILED
+
+
+def _one_failed(mask: int) -> State:
+    if not mask & FAILED_MASK:
+        return State.RUNNING
+    return State.FAILED
+
+
+def _none_failed(mask: int) -> State:
+    if mask & FAILED_MASK:
+        return State.FAILED
+    return State.RUNNING
+
+
+def _none_skipped(mask: int) -> State:
+    if mask & SKIPPED_MASK:
+        return State.FAILED
+    return State.RUNNING
+
+
+# Next state per trigger, given the folded states of all (completed) predecessors
+_TRIGGER_TABLE: Dict[Trigger, Callable[[int], State]] = {
+    Trigger.ALL_SUCCESS: _all_success,
+    Trigger.ALL_FAILED: _all_failed,
+    Trigger.ALL_DONE: _all_done,
+    Trigger.ONE_SUCCESS: _one_success,
+    Trigger.ONE_FAILED: _one_failed,
+    Trigger.NONE_FAILED: _none_failed,
+    Trigger.NONE_SKIPPED: _none_skipped,
+}
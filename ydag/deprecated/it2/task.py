@@ -1,8 +1,9 @@
+import functools
 import inspect
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Generic, TypeVar, Callable, Dict, Any, List
+from typing import Generic, TypeVar, Callable, Dict, Any, List, Tuple
 from uuid import UUID, uuid4
 
 InputType = TypeVar("InputType")
@@ -10,7 +11,13 @@ OutputType = TypeVar("OutputType")
 TransformedType = TypeVar("TransformedType")
 
 
-@dataclass
+@functools.lru_cache(maxsize=None)
+def _run_arg_names(run_fn: Callable[..., Any]) -> Tuple[str, ...]:
+    """Names of the arguments of an (unbound) run method, besides self; inspected once per Task subclass"""
+    return tuple(inspect.getfullargspec(run_fn).args[1:])
+
+
+@dataclass(slots=True)
 class Result(Generic[OutputType]):
     """Outcome of a runaable class"""
 
@@ -99,12 +106,7 @@ class Task(Generic[OutputType], Runnable[OutputType], ABC):
         self._wait_on: List["Task"] = wait_on or []
 
     def _get_run_kwargs(self) -> Dict[str, Any]:
-        arg_names = inspect.getfullargspec(self.run)[0]
-        if len(arg_names) == 1:
-            return {}
-
-        arg_names = arg_names[1:]  # Remove 'self'
-        return {arg: getattr(self, arg) for arg in arg_names}
+        return {arg: getattr(self, arg) for arg in _run_arg_names(type(self).run)}
 
     def _get_upstream_tasks(self) -> Dict[str, FutureTaskResult]:
         run_kwargs = self._get_run_kwargs()
@@ -118,9 +120,9 @@ class Task(Generic[OutputType], Runnable[OutputType], ABC):
         return upstream_results  # type: ignore
 
     async def _run_and_set_result(self, run_id: UUID):
-        logging.info(f"Running {self._id}")
+        logging.info("Running %s", self._id)
         run_kwargs = self._get_run_kwargs() | await self._get_upstream_results(run_id)
-        logging.debug(f"Kwargs for {self._id}.run(): {run_kwargs}")
+        logging.debug("Kwargs for %s.run(): %s", self._id, run_kwargs)
         try:
             self._result = Result[OutputType](value=await self.run(**run_kwargs))
         except BaseException as e:
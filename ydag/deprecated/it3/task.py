@@ -1,10 +1,11 @@
 import asyncio
+import functools
 import inspect
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from enum import Enum
-from typing import Generic, TypeVar, Callable, Dict, Any, List
+from enum import IntEnum
+from typing import Generic, TypeVar, Callable, Dict, Any, List, Tuple
 from uuid import UUID, uuid4
 
 InputType = TypeVar("InputType")
@@ -12,22 +13,28 @@ OutputType = TypeVar("OutputType")
 TransformedType = TypeVar("TransformedType")
 
 
-class State(Enum):
+@functools.lru_cache(maxsize=None)
+def _run_arg_names(run_fn: Callable[..., Any]) -> Tuple[str, ...]:
+    """Names of the arguments of an (unbound) run method, besides self; inspected once per Task subclass"""
+    return tuple(inspect.getfullargspec(run_fn).args[1:])
+
+
+class State(IntEnum):
     CREATED = 0
-    WAITING = (1,)
-    RUNNING = (2,)
-    # SKIPPED = (3,)
-    SUCCEEDED = (4,)
-    FAILED = (5,)
-    UPSTREAM_FAILED = (6,)
-    # UPSTREAM_SKIPPED = (7,)
+    WAITING = 1
+    RUNNING = 2
+    # SKIPPED = 3
+    SUCCEEDED = 4
+    FAILED = 5
+    UPSTREAM_FAILED = 6
+    # UPSTREAM_SKIPPED = 7
 
 
-FAILED_STATES = [State.FAILED, State.UPSTREAM_FAILED]
-FINAL_STATES = [State.SUCCEEDED] + FAILED_STATES
+FAILED_STATES = frozenset({State.FAILED, State.UPSTREAM_FAILED})
+FINAL_STATES = FAILED_STATES | {State.SUCCEEDED}
 
 
-@dataclass
+@dataclass(slots=True)
 class Result(Generic[OutputType]):
     """Outcome of a runnable class"""
 
@@ -64,21 +71,16 @@ class Task(Generic[OutputType], ABC):
 
     def _get_run_kwargs(self) -> Dict[str, Any]:
         """Matches kwarg names to class variables"""
-        arg_names = inspect.getfullargspec(self._run)[0]
-        if len(arg_names) == 1:
-            return {}
-
-        arg_names = arg_names[1:]  # Remove 'self'
-        return {arg: getattr(self, arg) for arg in arg_names}
+        return {arg: getattr(self, arg) for arg in _run_arg_names(type(self)._run)}
 
     def _set_state(self, state: State):
         if self._state != state and self._is_independent:
-            logging.debug(f"Task {self._id} moved to state {self._state}")
+            logging.debug("Task %s moved to state %s", self._id, self._state)
         self._state = state
 
     @staticmethod
     async def _get_results_for_tasks(run_id: UUID, tasks: Dict[str, "Task"]):
-        logging.debug(f"Getting results for tasks {tasks}")
+        logging.debug("Getting results for tasks %s", tasks)
         async_tasks = []
         for task in tasks.values():
             async_tasks.append(asyncio.create_task(task.run(run_id)))
@@ -89,7 +91,7 @@ class Task(Generic[OutputType], ABC):
     async def run(self, run_id: UUID = uuid4()) -> Result[OutputType]:
         self._set_state(State.WAITING)
         run_kwargs = self._get_run_kwargs()
-        logging.debug(f"_run kwargs for {self._id}.run(): {run_kwargs}")
+        logging.debug("_run kwargs for %s.run(): %s", self._id, run_kwargs)
         upstream_tasks_for_input: Dict[str, Task] = {
             kw: arg for kw, arg in run_kwargs.items() if isinstance(arg, Task)
         }
@@ -99,7 +101,7 @@ class Task(Generic[OutputType], ABC):
         upstream_tasks: Dict[str, Task] = (
             upstream_tasks_for_input | upstream_tasks_not_for_input
         )
-        logging.debug(f"Upstream tasks for {self._id}.run(): {upstream_tasks}")
+        logging.debug("Upstream tasks for %s.run(): %s", self._id, upstream_tasks)
         upstream_task_results: Dict[str, Result] = await self._get_results_for_tasks(
             run_id, upstream_tasks
         )
@@ -117,7 +119,7 @@ class Task(Generic[OutputType], ABC):
         }
         self._set_state(State.RUNNING)
         try:
-            logging.debug(f"Kwargs for {self._id}.run(): {final_run_kwargs}")
+            logging.debug("Kwargs for %s.run(): %s", self._id, final_run_kwargs)
             self._result = Result[OutputType](value=await self._run(**final_run_kwargs))
             self._set_state(State.SUCCEEDED)
         except BaseException as e:
@@ -164,7 +166,7 @@ class TransformTask(Generic[InputType, OutputType], Task[OutputType]):
         self._transformation_func = transformation_func
 
     async def _run(self, upstream_task: InputType) -> OutputType:
-        logging.debug(f"Running transformation on {upstream_task}")
+        logging.debug("Running transformation on %s", upstream_task)
         return self._transformation_func(upstream_task)
 
 
@@ -5,9 +5,6 @@ import time
 from ydag.deprecated.it4.task import Task
 
 
-logging.basicConfig(level=logging.DEBUG)
-
-
 class GetOneTask(Task[int]):
     async def _run(self) -> int:
         return 1
@@ -24,7 +21,7 @@ class WaitTask(Task[None]):
         self.delay = delay
 
     async def _run(self, delay: int) -> None:
-        logging.debug(f"Waiting {delay} seconds")
+        logging.debug("Waiting %s seconds", delay)
         await asyncio.sleep(delay)
 
 
@@ -1,34 +1,66 @@
 import asyncio
+import atexit
+import functools
 import inspect
+import itertools
 import logging
+import threading
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
 from time import time
-from typing import Generic, TypeVar, Callable, Dict, Any, List
-from uuid import uuid4, uuid1
+from typing import Generic, TypeVar, Callable, Dict, Any, List, Tuple
 
 InputType = TypeVar("InputType")
 OutputType = TypeVar("OutputType")
 TransformedType = TypeVar("TransformedType")
 
 
-class State(Enum):
+@functools.lru_cache(maxsize=None)
+def _run_arg_names(run_fn: Callable[..., Any]) -> Tuple[str, ...]:
+    """Names of the arguments of an (unbound) run method, besides self; inspected once per Task subclass"""
+    return tuple(inspect.getfullargspec(run_fn).args[1:])
+
+
+# Ids of dag runs, and of tasks that were not given one; unique within the process
+_ids = itertools.count()
+
+_runner: asyncio.Runner | None = None
+
+
+def _new_runner() -> asyncio.Runner:
+    runner = asyncio.Runner()
+    if hasattr(asyncio, "eager_task_factory"):  # Python >= 3.12
+        # Upstream tasks that complete without suspending do not need a round trip through the scheduler
+        runner.get_loop().set_task_factory(asyncio.eager_task_factory)
+    return runner
+
+
+def _get_runner() -> asyncio.Runner:
+    """Event loop shared by all run_sync calls in the main thread; created on first use, and closed on exit"""
+    global _runner
+    if _runner is None:
+        _runner = _new_runner()
+        atexit.register(_runner.close)
+    return _runner
+
+
+class State(IntEnum):
     CREATED = 0
-    WAITING = (1,)
-    RUNNING = (2,)
-    # SKIPPED = (3,)
-    SUCCEEDED = (4,)
-    FAILED = (5,)
-    UPSTREAM_FAILED = (6,)
-    # UPSTREAM_SKIPPED = (7,)
+    WAITING = 1
+    RUNNING = 2
+    # SKIPPED = 3
+    SUCCEEDED = 4
+    FAILED = 5
+    UPSTREAM_FAILED = 6
+    # UPSTREAM_SKIPPED = 7
 
 
-FAILED_STATES = [State.FAILED, State.UPSTREAM_FAILED]
-FINAL_STATES = [State.SUCCEEDED] + FAILED_STATES
+FAILED_STATES = frozenset({State.FAILED, State.UPSTREAM_FAILED})
+FINAL_STATES = FAILED_STATES | {State.SUCCEEDED}
 
 
-@dataclass
+@dataclass(slots=True)
 class Result(Generic[OutputType]):
     """Outcome of a runnable class"""
 
@@ -50,12 +82,12 @@ class DagRun:
     """Class to hold all task results"""
 
     def __init__(self):
-        self._run_id = uuid4()
+        self._run_id = next(_ids)
         self._start_time = time()
         self._results: Dict[str, Result] = {}
 
     def add_result(self, task: "Task[InputType]", result: Result[InputType]):
-        logging.debug(f"DagRun {self._run_id} received result {result} for task {task.id}")
+        logging.debug("DagRun %s received result %s for task %s", self._run_id, result, task.id)
         # if task.is_independent:
         self._results[task.id] = result
 
@@ -69,7 +101,7 @@ class Task(Generic[OutputType], ABC):
     def __init__(
             self, id: str | None = None, wait_on: List["Task"] | None = None
     ) -> None:
-        self._id = id or str(uuid1())
+        self._id = id or f"_t{next(_ids)}"
         self._is_independent = id is not None
         self._wait_on = wait_on or []
         # self._state = State.CREATED
@@ -94,41 +126,43 @@ class Task(Generic[OutputType], ABC):
 
     def _get_run_kwargs(self) -> Dict[str, Any]:
         """Matches kwarg names to class variables"""
-        arg_names = inspect.getfullargspec(self._run)[0]
-        if len(arg_names) == 1:
-            return {}
-
-        arg_names = arg_names[1:]  # Remove 'self'
-        return {arg: getattr(self, arg) for arg in arg_names}
+        return {arg: getattr(self, arg) for arg in _run_arg_names(type(self)._run)}
 
     def _state_change(self, old_state: State, new_state: State) -> State:
         if old_state != new_state and self._is_independent:
-            logging.debug(f"Task {self._id} moved to state {new_state}")
+            logging.debug("Task %s moved to state %s", self._id, new_state)
         return new_state
 
     @staticmethod
-    async def _run_tasks(dag_run: DagRun, tasks: Dict[str, "Task"]) -> None:
-        logging.debug(f"Running tasks {tasks}")
-        async_tasks = []
-        for task in tasks.values():
-            async_tasks.append(asyncio.create_task(task.run(dag_run)))
-        await asyncio.gather(*async_tasks)
-
-    async def run(self, dag_run: DagRun) -> None:
-        state = State.WAITING
-        run_kwargs = self._get_run_kwargs()
-        logging.debug(f"_run kwargs for {self._id}.run(): {run_kwargs}")
+    async def _run_tasks(dag_run: DagRun, tasks: Tuple["Task", ...]) -> None:
+        logging.debug("Running tasks %s", tasks)
+        async with asyncio.TaskGroup() as tg:
+            for task in tasks:
+                tg.create_task(task.run(dag_run))
+
+    @functools.cached_property
+    def _upstream_tasks(self) -> Dict[str, "Task"]:
+        """Upstream tasks by parameter name; gathered once, as the dag does not change after construction"""
         upstream_tasks_for_input: Dict[str, Task] = {
-            kw: arg for kw, arg in run_kwargs.items() if isinstance(arg, Task)
+            kw: arg for kw, arg in self._get_run_kwargs().items() if isinstance(arg, Task)
         }
         upstream_tasks_not_for_input: Dict[str, Task] = {
             f"wait_on_{i}": task for i, task in enumerate(self._wait_on)
         }
-        upstream_tasks: Dict[str, Task] = (
-                upstream_tasks_for_input | upstream_tasks_not_for_input
-        )
-        logging.debug(f"Upstream tasks for {self._id}.run(): {upstream_tasks}")
-        await self._run_tasks(dag_run, upstream_tasks)
+        return upstream_tasks_for_input | upstream_tasks_not_for_input
+
+    @functools.cached_property
+    def _unique_upstream_tasks(self) -> Tuple["Task", ...]:
+        """Upstream tasks to run, each once; the same task may be given for multiple parameters"""
+        return tuple(dict.fromkeys(self._upstream_tasks.values()))
+
+    async def run(self, dag_run: DagRun) -> None:
+        state = State.WAITING
+        run_kwargs = self._get_run_kwargs()
+        logging.debug("_run kwargs for %s.run(): %s", self._id, run_kwargs)
+        upstream_tasks = self._upstream_tasks
+        logging.debug("Upstream tasks for %s.run(): %s", self._id, upstream_tasks)
+        await self._run_tasks(dag_run, self._unique_upstream_tasks)
 
         upstream_task_results: Dict[str, Result] = {kw: dag_run.get_result(task) for kw, task in upstream_tasks.items()}
         failed_upstream_tasks: Dict[str, Result] = {
@@ -159,7 +193,7 @@ class Task(Generic[OutputType], ABC):
         final_run_kwargs = run_kwargs | upstream_task_values
         state = self._state_change(state, State.RUNNING)
         try:
-            logging.debug(f"Final kwargs for {self._id}._run(): {final_run_kwargs}")
+            logging.debug("Final kwargs for %s._run(): %s", self._id, final_run_kwargs)
             res = Result[OutputType](value=await self._run(**final_run_kwargs))
             dag_run.add_result(self, res)
             state = self._state_change(state, State.SUCCEEDED)
@@ -170,7 +204,12 @@ class Task(Generic[OutputType], ABC):
             dag_run.add_result(self, res)
 
     def run_sync(self, dag_run: DagRun = DagRun()) -> DagRun:
-        asyncio.run(self.run(dag_run))
+        if threading.current_thread() is threading.main_thread():
+            _get_runner().run(self.run(dag_run))
+        else:
+            # Other threads may be short-lived; a cached event loop would stay open until exit
+            with _new_runner() as runner:
+                runner.run(self.run(dag_run))
         return dag_run
 
     def result(self) -> Result[OutputType]:
@@ -199,7 +238,7 @@ class TransformTask(Generic[InputType, OutputType], Task[OutputType]):
         self._transformation_func = transformation_func
 
     async def _run(self, upstream_task: InputType) -> OutputType:
-        logging.debug(f"Running transformation on {upstream_task.id}")
+        logging.debug("Running transformation on %s", upstream_task)
         return self._transformation_func(upstream_task)
 
 
@@ -1,24 +1,41 @@
 import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
 import inspect
+import itertools
 import logging
+import os
+import pickle
+import sys
 from abc import abstractmethod, ABC
+from collections import Counter
 from dataclasses import dataclass
-from enum import Enum
-from typing import Any, Dict, TypeAlias, Callable
+from enum import IntEnum
+from graphlib import TopologicalSorter
+from typing import Any, Dict, TypeAlias, Callable, Iterable, Sequence, Tuple
 from typing import Generic, List
 from typing import TypeVar
-from uuid import uuid4
 
+_logger = logging.getLogger(__name__)
+# Dag run ids are only used to tell runs apart in the logs
+_run_ids = itertools.count()
 
-class State(Enum):
+
+class State(IntEnum):
     CREATED = 0
-    WAITING = (1,)
-    RUNNING = (2,)
-    SKIPPED = (3,)
-    SUCCEEDED = (4,)
-    FAILED = (5,)
-    UPSTREAM_FAILED = (6,)
-    UPSTREAM_SKIPPED = (7,)
+    WAITING = 1
+    RUNNING = 2
+    SKIPPED = 3
+    SUCCEEDED = 4
+    FAILED = 5
+    UPSTREAM_FAILED = 6
+    UPSTREAM_SKIPPED = 7
+
+
+_FAILED_STATES = frozenset({State.FAILED, State.UPSTREAM_FAILED})
+_SKIPPED_STATES = frozenset({State.SKIPPED, State.UPSTREAM_SKIPPED})
 
 
 InputType = TypeVar("InputType")
@@ -26,7 +43,7 @@ OutputType = TypeVar("OutputType")
 TransformedType = TypeVar("TransformedType")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TaskResult(Generic[OutputType]):
     """Outcome of a runnable class"""
 
@@ -35,90 +52,398 @@ class TaskResult(Generic[OutputType]):
     error: BaseException | None = None
 
 
+CacheKey: TypeAlias = Tuple[str, str]
+
+
+@functools.cache
+def _class_digest(cls: type) -> str:
+    """
+    Hash of the source of a task class and its bases up to Task,
+    so cached results are invalidated when the class or an inherited run() changes
+    """
+    digest = hashlib.sha256()
+    for klass in cls.__mro__:
+        if klass is Task:
+            break
+        try:
+            source = inspect.getsource(klass)
+        except (OSError, TypeError):  # pragma: no cover
+            source = klass.__qualname__
+        digest.update(source.encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed store of task results that can be shared between dag runs"""
+
+    def __init__(self, path: str | None = None):
+        """
+
+        :param path: Optional file to persist the cache to
+        """
+        self._path = path
+        self._entries: Dict[CacheKey, TaskResult] = {}
+        # If there are entries that were not persisted yet
+        self._dirty = False
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                self._entries = pickle.load(f)
+
+    @staticmethod
+    def key(task: "Task[Any]", run_args: Sequence[Any]) -> CacheKey | None:
+        """
+        Key a task run on its id, the source of its class and its resolved run args.
+        Returns None if the args cannot be pickled, in which case the run cannot be memoized.
+        """
+        try:
+            args_bytes = pickle.dumps(tuple(run_args))
+        except Exception:
+            return None
+        digest = hashlib.sha256(_class_digest(type(task)).encode() + args_bytes).hexdigest()
+        return task.id, digest
+
+    def get(self, key: CacheKey) -> "TaskResult | None":
+        return self._entries.get(key)
+
+    def put(self, key: CacheKey, result: "TaskResult") -> None:
+        """
+        Store a result. If the cache is persisted, results that cannot be pickled are not stored,
+        as they could not be saved, and would keep later saves from succeeding.
+        """
+        if self._path is not None:
+            try:
+                pickle.dumps(result)
+            except Exception:
+                return
+        self._entries[key] = result
+        self._dirty = True
+
+    def save(self) -> None:
+        """
+        Persist the entries to the file, if any, when there are new ones.
+        Written to a temporary file first, so a crash during writing does not leave a corrupt cache behind.
+        """
+        if self._path is None or not self._dirty:
+            return
+        tmp_path = f"{self._path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(self._entries, f)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        self._dirty = False
+
+
+# Placeholder result of tasks that did not complete yet
+_PENDING: TaskResult = TaskResult()
+
+
 class DagRun:
     """Class to hold all task state and results"""
 
-    def __init__(self):
-        self._run_id = uuid4()
-        self._running_tasks: Dict[Task, asyncio.Task[Any]] = {}
-        self._results: Dict[Task, TaskResult] = {}
+    def __init__(self, cache: ResultCache | None = None, release_results: bool = False, max_workers: int | None = None):
+        """
+
+        :param cache: Results of earlier runs; tasks with a cached result for the same inputs are not run again.
+            New results are saved to its file, if any, at the end of each call to run
+        :param release_results: Drop the values of upstream tasks once no downstream task in any pending call to run
+            needs them anymore, to free memory; the values of the tasks passed to run are kept.
+            A task of which the value was dropped is run again when a later call to run needs its value.
+        :param max_workers: Number of tasks to execute at the same time in this dag run, also over concurrent calls
+            to run; unbounded if None
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers should be at least 1, got {max_workers}")
+        self._run_id = next(_run_ids)
+        self._cache = cache
+        self._release_results = release_results
+        # Held while a task executes, so the bound holds for all calls to run, including those of check_skip_first
+        self._limit: contextlib.AbstractAsyncContextManager[Any] = (
+            asyncio.Semaphore(max_workers) if max_workers is not None else contextlib.nullcontext())
+        # Task index by task id; str keys hash and compare in C, unlike Task.__hash__/__eq__
+        self._index: Dict[str, int] = {}
+        self._tasks: List[Task] = []
+        self._plans: Dict[int, Tuple[int, ...]] = {}
+        self._running_tasks: Dict[int, asyncio.Task[None]] = {}
+        # Results by task index; _PENDING until the task completed
+        self._results: List[TaskResult] = []
+        # Number of downstream tasks, over all pending calls to run, that still need the value of each task
+        self._consumers: Counter[int] = Counter()
+        # Tasks passed to run, of which the values are never released
+        self._kept: set[int] = set()
+        # Tasks of which the value was released
+        self._released: set[int] = set()
 
     async def run(self, task: "Task[OutputType]") -> None:
         """
-        Run a task and store the result in the dag run
+        Run a task, and all of its upstream tasks, and store the results in the dag run
+        """
+        try:
+            await self._run(task, keep=True)
+        except BaseException:
+            # Save what was completed, without hiding the error of the run
+            if self._cache is not None:
+                with contextlib.suppress(Exception):
+                    self._cache.save()
+            raise
+        if self._cache is not None:
+            self._cache.save()
+
+    async def _run(self, task: "Task[Any]", keep: bool) -> None:
         """
-        logging.debug(f"{self._run_id} - Running task {task.id}")
+        Run a task, and all of its upstream tasks
+
+        :param keep: If the value of the task should be kept when releasing results
+        """
+        _logger.debug("%s - Running task %s", self._run_id, task.id)
+        if keep:
+            self._kept.add(self._intern(task))
 
         # Task was already completed
-        if task in self._results.keys():
-            logging.debug(f"{self._run_id} - Task {task.id} already completed")
+        if self._is_completed(task):
+            _logger.debug("%s - Task %s already completed", self._run_id, task.id)
             return
 
-        # Task was already started
-        if task in self._running_tasks.keys():
-            logging.debug(f"{self._run_id} - Task {task.id} already started")
-            return await self._running_tasks[task]
-
-        # If the task can be skipped directly
-        if not task.has_skip_task and task.should_be_skipped:
-            logging.debug(f"{self._run_id} - Task {task.id} should be skipped")
-            self._results[task] = TaskResult(state=State.SKIPPED)
+        graph = self._build_graph(task)
+        self._hold(itertools.chain.from_iterable(graph.values()))
+        sorter = TopologicalSorter(graph)
+        sorter.prepare()
+        # The scheduling tasks of this call do not set context variables, so they share one context instead of
+        # copying it per task; task executions still get their own copy, and a call made from within a task
+        # execution gets its own shared context, so a context is never entered twice, not even with eager tasks
+        context = contextvars.copy_context()
+        completed = asyncio.Event()
+        async with asyncio.TaskGroup() as tg:
+            while sorter.is_active():
+                # Start all tasks that became ready in one go, then wait until any of them completes
+                for idx in sorter.get_ready():
+                    tg.create_task(self._await_execution(idx, sorter, completed, graph[idx]), context=context)
+                await completed.wait()
+                completed.clear()
+
+    async def _await_execution(
+            self,
+            idx: int,
+            sorter: TopologicalSorter[int],
+            completed: asyncio.Event,
+            upstream: Tuple[int, ...],
+    ) -> None:
+        """Await the execution of a task and mark it as done for the sorter"""
+        await self._claim(idx)
+        self._release(upstream)
+        sorter.done(idx)
+        completed.set()
+
+    def _hold(self, upstream: Iterable[int]) -> None:
+        """Count a downstream task that needs the values of upstream tasks, so they are not released"""
+        if self._release_results:
+            self._consumers.update(upstream)
+
+    def _release(self, upstream: Iterable[int]) -> None:
+        """
+        Uncount a downstream task that needed the values of upstream tasks,
+        and drop the values of upstream tasks that no downstream task needs anymore
+        """
+        if not self._release_results:
+            return
+        consumers = self._consumers
+        for upstream_idx in upstream:
+            consumers[upstream_idx] -= 1
+            if consumers[upstream_idx] == 0:
+                del consumers[upstream_idx]
+                if upstream_idx not in self._kept:
+                    result = self._results[upstream_idx]
+                    self._results[upstream_idx] = TaskResult(state=result.state, error=result.error)
+                    self._released.add(upstream_idx)
+
+    def _claim(self, idx: int) -> "asyncio.Task[None]":
+        """
+        Get the execution of a task, starting it if no call has claimed it yet.
+        Claiming does not await, so concurrent calls always share the execution of the first one.
+        """
+        running = self._running_tasks.get(idx)
+        if running is None:
+            running = self._running_tasks[idx] = asyncio.create_task(self._execute(idx))
+        return running
+
+    def _intern(self, task: "Task[Any]") -> int:
+        """Get the index of a task in this dag run, assigning the next one for a new task"""
+        idx = self._index.get(task.id)
+        if idx is None:
+            idx = self._index[task.id] = len(self._tasks)
+            self._tasks.append(task)
+            self._results.append(_PENDING)
+        return idx
+
+    def _plan(self, idx: int) -> Tuple[int, ...]:
+        """
+        Get the indices of the tasks to schedule before a task can be executed.
+        Tasks with a constant result need none, and tasks with check_skip_first only need their skip task;
+        their other upstream tasks are only scheduled when the task turns out not to be skipped.
+        """
+        plan = self._plans.get(idx)
+        if plan is None:
+            task = self._tasks[idx]
+            upstream_tasks: Tuple[Task[Any], ...]
+            if task.constant_result is not None:
+                upstream_tasks = ()
+            elif task.needs_to_run_skip_task_first:
+                upstream_tasks = (task.skip_task,)
+            else:
+                upstream_tasks = task.upstream_tasks
+            plan = self._plans[idx] = tuple(self._intern(upstream_task) for upstream_task in upstream_tasks)
+        return plan
+
+    def _build_graph(self, task: "Task[Any]") -> Dict[int, Tuple[int, ...]]:
+        """
+        Collect the indices of the tasks that need to complete before each task can be executed,
+        starting at the given task
+        """
+        graph: Dict[int, Tuple[int, ...]] = {}
+        stack = [self._intern(task)]
+        while stack:
+            idx = stack.pop()
+            if idx in graph:
+                continue
+            if idx in self._released:
+                # The value is needed again; no pending call to run needs the released result, so run the task again
+                self._released.discard(idx)
+                self._results[idx] = _PENDING
+                del self._running_tasks[idx]
+            # Completed tasks do not need their upstream tasks anymore
+            graph[idx] = () if self._results[idx] is not _PENDING else self._plan(idx)
+            stack.extend(graph[idx])
+        return graph
+
+    async def _execute(self, idx: int) -> None:
+        """
+        Execute a single task, of which all upstream tasks in the graph are completed
+        """
+        task = self._tasks[idx]
+        results = self._results
+        index = self._index
+
+        # If the result of the task is known without running it, e.g. when it should be skipped directly
+        if task.constant_result is not None:
+            _logger.debug("%s - Task %s has a constant result", self._run_id, task.id)
+            results[idx] = task.constant_result
             return
 
-        # If the skip task needs to run first, run it
+        # If the skip task was run first, check it before running the other upstream tasks
         if task.needs_to_run_skip_task_first:
-            logging.debug(f"{self._run_id} - For task {task.id} waiting for skip task {task.skip_task.id}")
-            await self.run(task.skip_task)
-
-            if self._results[task.skip_task].value:
-                logging.debug(f"{self._run_id} - Task {task.id} should be skipped")
-                self._results[task] = TaskResult(state=State.SKIPPED)
+            if results[index[task.skip_task.id]].value:
+                _logger.debug("%s - Task %s should be skipped", self._run_id, task.id)
+                results[idx] = TaskResult(state=State.SKIPPED)
                 return
 
-        # Run all upstream tasks in parallel
-        # TODO do not await all, but re-evaluate next step each time a task finishes
-        await asyncio.gather(*[asyncio.create_task(self.run(task))
-                               for task in task.upstream_tasks])
+            _logger.debug("%s - For task %s running remaining upstream tasks", self._run_id, task.id)
+            remaining = tuple(self._intern(upstream_task) for upstream_task in task.upstream_tasks
+                              if upstream_task != task.skip_task)
+            # Keep their values until this task is done with them
+            self._hold(remaining)
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    for upstream_idx in remaining:
+                        tg.create_task(self._run(self._tasks[upstream_idx], keep=False))
+                await self._execute_upstream_completed(idx)
+            finally:
+                self._release(remaining)
+            return
+
+        await self._execute_upstream_completed(idx)
+
+    async def _execute_upstream_completed(self, idx: int) -> None:
+        """
+        Execute a single task, of which all upstream tasks are completed
+        """
+        task = self._tasks[idx]
+        results = self._results
+        index = self._index
+
+        # Check the upstream states in a single pass; a failure takes precedence over a skip
+        failed = skipped = False
+        for upstream_task in task.upstream_tasks:
+            upstream_state = results[index[upstream_task.id]].state
+            if upstream_state in _FAILED_STATES:
+                failed = True
+                break
+            if upstream_state in _SKIPPED_STATES:
+                skipped = True
 
         # If any upstream task failed, mark this task as failed
-        if any(self._results[upstream_task].state in [State.FAILED, State.UPSTREAM_FAILED]
-               for upstream_task in task.upstream_tasks):
-            logging.debug(f"{self._run_id} - Task {task.id} failed because of upstream task(s)")
-            self._results[task] = TaskResult(state=State.UPSTREAM_FAILED)
+        if failed:
+            _logger.debug("%s - Task %s failed because of upstream task(s)", self._run_id, task.id)
+            results[idx] = TaskResult(state=State.UPSTREAM_FAILED)
             return
 
         # If any upstream task was skipped, mark this task as skipped
-        if any(self._results[upstream_task].state in [State.SKIPPED, State.UPSTREAM_SKIPPED]
-               for upstream_task in task.upstream_tasks):
-            logging.debug(f"{self._run_id} - Task {task.id} skipped because of upstream task(s)")
-            self._results[task] = TaskResult(state=State.UPSTREAM_SKIPPED)
+        if skipped:
+            _logger.debug("%s - Task %s skipped because of upstream task(s)", self._run_id, task.id)
+            results[idx] = TaskResult(state=State.UPSTREAM_SKIPPED)
             return
 
         # Test again if this task should be skipped
-        if not task.needs_to_run_skip_task_first and task.has_skip_task and self._results[task.skip_task].value:
-            logging.debug(f"{self._run_id} - Task {task.id} should be skipped")
-            self._results[task] = TaskResult(state=State.SKIPPED)
+        if not task.needs_to_run_skip_task_first and task.has_skip_task and results[index[task.skip_task.id]].value:
+            _logger.debug("%s - Task %s should be skipped", self._run_id, task.id)
+            results[idx] = TaskResult(state=State.SKIPPED)
             return
 
         # Run the task
-        run_kwargs_before = task.get_run_kwargs_before_execution()
-        run_kwargs_after = {kw: self._results[arg].value if isinstance(arg, Task) else arg
-                            for kw, arg in run_kwargs_before.items()}
+        run_args = [results[index[upstream_task.id]].value if upstream_task is not None else getattr(task, arg)
+                    for arg, upstream_task in task.run_arg_sources]
+        cache = self._cache if task.memoize else None
+        cache_key = ResultCache.key(task, run_args) if cache is not None else None
+        if cache is not None and cache_key is not None and (cached := cache.get(cache_key)) is not None:
+            _logger.debug("%s - Task %s result taken from cache", self._run_id, task.id)
+            results[idx] = cached
+            return
+
+        _logger.debug("%s - Starting task %s", self._run_id, task.id)
         try:
-            self._running_tasks[task] = asyncio.create_task(task.run(**run_kwargs_after))
-            result = await self._running_tasks[task]
-            self._results[task] = TaskResult(value=result, state=State.SUCCEEDED)
+            async with self._limit:
+                result = await task.run(*run_args)
+            results[idx] = TaskResult(value=result, state=State.SUCCEEDED)
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, results[idx])
+            if task.pure:
+                task.set_constant_result(results[idx])
         except BaseException as e:
-            self._results[task] = TaskResult(error=e, state=State.FAILED)
+            results[idx] = TaskResult(error=e, state=State.FAILED)
 
     def get_result(self, task: "Task[OutputType]") -> TaskResult[OutputType]:
         """
         Get the result of a task
         """
-        return self._results[task]
+        idx = self._index[task.id]
+        result = self._results[idx]
+        if result is _PENDING:
+            raise KeyError(f"Task {task.id} was not completed")
+        if idx in self._released:
+            raise KeyError(f"The result of task {task.id} was released, as no downstream task needed it anymore")
+        return result
+
+    def _is_completed(self, task: "Task[Any]") -> bool:
+        """Check if a task has a result in this dag run, of which the value was not released"""
+        idx = self._index.get(task.id)
+        return idx is not None and self._results[idx] is not _PENDING and idx not in self._released
+
+
+# Kinds of skip argument of a task
+_SKIP_NEVER = 0
+_SKIP_ALWAYS = 1
+_SKIP_TASK = 2
 
 
 class Task(Generic[OutputType], ABC):
+    # Set to True if run() always returns the same value without side effects.
+    # Without any upstream tasks, its first result is then reused by all dag runs.
+    pure: bool = False
+    # Names of the arguments of run(), besides self
+    _run_arg_names: Tuple[str, ...] = ()
+
     def __init__(
             self,
             id: str,
@@ -126,6 +451,7 @@ class Task(Generic[OutputType], ABC):
             wait_on: List["Task[Any]"] | None = None,
             skip: "Task[bool] | bool" = False,
             check_skip_first: bool = False,
+            memoize: bool = True,
     ):
         """
 
@@ -133,36 +459,63 @@ class Task(Generic[OutputType], ABC):
         :param wait_on: Upstream tasks that need to complete before
         :param skip: If the outcome of this task is true, this task should be skipped
         :param check_skip_first: If the "skip" task should be completed before the upstream tasks are run
+        :param memoize: If the result may be reused for the same inputs; disable for non-deterministic tasks
         """
-        self._id = id
+        self._id = sys.intern(id)
+        self._hash = hash(self._id)
         self._wait_on = wait_on or []
-        self._skip = skip
+        # Determine once what kind of skip was given, so checks do not need isinstance
+        self._skip_task: Task[bool] | None = skip if isinstance(skip, Task) else None
+        self._skip_kind = _SKIP_TASK if isinstance(skip, Task) else _SKIP_ALWAYS if skip else _SKIP_NEVER
         self._check_skip_first = check_skip_first
+        self._memoize = memoize
+        self._constant_result: TaskResult[OutputType] | None = (
+            TaskResult(state=State.SKIPPED) if not self.has_skip_task and self.should_be_skipped else None
+        )
 
     @property
     def id(self) -> str:
         return self._id
 
+    @property
+    def memoize(self) -> bool:
+        return self._memoize
+
+    @property
+    def constant_result(self) -> TaskResult[OutputType] | None:
+        """Result that is known without running the task, if any"""
+        return self._constant_result
+
+    def set_constant_result(self, result: TaskResult[OutputType]) -> None:
+        """Keep the result of a pure task without upstream tasks, to reuse in later dag runs"""
+        if self.pure and not self.upstream_tasks:
+            self._constant_result = result
+
     @property
     def needs_to_run_skip_task_first(self) -> bool:
-        return isinstance(self._skip, Task) and self._check_skip_first
+        return self._skip_kind == _SKIP_TASK and self._check_skip_first
 
     @property
     def has_skip_task(self) -> bool:
-        return isinstance(self._skip, Task)
+        return self._skip_kind == _SKIP_TASK
 
     @property
     def should_be_skipped(self) -> bool:
-        if isinstance(self._skip, bool):
-            return self._skip
+        if self._skip_kind != _SKIP_TASK:
+            return self._skip_kind == _SKIP_ALWAYS
         raise ValueError(f"Skip is not a bool for task {self._id}")  # pragma: no cover
 
     @property
     def skip_task(self) -> "Task[bool]":
-        if isinstance(self._skip, Task):
-            return self._skip
+        if self._skip_task is not None:
+            return self._skip_task
         raise ValueError(f"No skip task defined for task {self._id}")
 
+    def __init_subclass__(cls, **kwargs):
+        """Inspect the signature of run() once per subclass, instead of on every execution"""
+        super().__init_subclass__(**kwargs)
+        cls._run_arg_names = tuple(inspect.getfullargspec(cls.run).args[1:])  # Remove 'self'
+
     @abstractmethod
     async def run(self, *args, **kwargs) -> OutputType:
         pass
@@ -174,25 +527,33 @@ class Task(Generic[OutputType], ABC):
         E.g., if _run() has the signature `async def _run(self, x: Task[int], y: int):`,
         this method will return {'x': self.x, 'y': self.y}.
         """
-        arg_names = inspect.getfullargspec(self.run)[0]
-        if len(arg_names) == 1:
-            return {}
-
-        arg_names = arg_names[1:]  # Remove 'self'
-        return {arg: getattr(self, arg) for arg in arg_names}
+        return {arg: getattr(self, arg) for arg in self._run_arg_names}
 
-    @property
-    def upstream_tasks(self) -> List["Task[Any]"]:
+    @functools.cached_property
+    def upstream_tasks(self) -> Tuple["Task[Any]", ...]:
+        """
+        Gathers all unique upstream tasks that need to trigger before execution, in order of first reference.
+        Gathered once on first access, when subclasses have set their attributes.
+        """
+        # A task may be referenced more than once, e.g. as wait_on and as argument
+        return tuple(dict.fromkeys(itertools.chain(
+            (self._skip_task,) if self._skip_task is not None else (),
+            self._wait_on,
+            (upstream_task for _, upstream_task in self.run_arg_sources if upstream_task is not None),
+        )))
+
+    @functools.cached_property
+    def run_arg_sources(self) -> Tuple[Tuple[str, "Task[Any] | None"], ...]:
         """
-        Gathers all upstream tasks that need to trigger before execution
+        Per run() argument, in order, its name and the upstream task that provides its value,
+        or None if the value is taken from the class variable itself.
+        Classified once on first access, like upstream_tasks; those values are still read on every execution.
         """
-        return (
-                ([self._skip] if isinstance(self._skip, Task) else [])
-                + self._wait_on
-                + [
-                    arg for arg in self.get_run_kwargs_before_execution().values()
-                    if isinstance(arg, Task)
-                ])
+        sources: List[Tuple[str, Task[Any] | None]] = []
+        for arg in self._run_arg_names:
+            value = getattr(self, arg)
+            sources.append((arg, value if isinstance(value, Task) else None))
+        return tuple(sources)
 
     def __eq__(self, another):
         """Test for equality to use object as key in a set"""
@@ -200,7 +561,7 @@ class Task(Generic[OutputType], ABC):
 
     def __hash__(self):
         """Hash function to use object as key in a set"""
-        return hash(self._id)
+        return self._hash
 
     def transform(self, func: Callable[[OutputType], TransformedType]) -> "TransformTask[OutputType, TransformedType]":
         """Create new Task that transforms the result value of this task"""
@@ -212,15 +573,32 @@ class TransformTask(Generic[InputType, OutputType], Task[OutputType]):
             self,
             upstream_task: Task[InputType],
             func: Callable[[InputType], OutputType],
+            *,
+            _preceding_funcs: Tuple[Callable[[Any], Any], ...] = (),
     ):
-        task_id = f"{upstream_task.id}_tf{hash(func)}"
-        super().__init__(task_id)
+        """
+
+        :param upstream_task: Task of which the result value is transformed
+        :param func: Transformation function
+        :param _preceding_funcs: Transformations to apply before func, when chaining transformations
+        """
+        funcs = _preceding_funcs + (func,)
+        task_id = f"{upstream_task.id}_tf{hash(func) if len(funcs) == 1 else hash(funcs)}"
+        # The id is only unique among functions that are alive, and the functions are not part of the cache key
+        super().__init__(task_id, memoize=False)
         self.upstream_task = upstream_task
-        self._func = func
+        self._funcs = funcs
 
     async def run(self, upstream_task: InputType) -> OutputType:
-        """Apply transformation function to upstream task result value"""
-        return self._func(upstream_task)
+        """Apply the transformation function(s) to upstream task result value, in order"""
+        value: Any = upstream_task
+        for func in self._funcs:
+            value = func(value)
+        return value
+
+    def transform(self, func: Callable[[OutputType], TransformedType]) -> "TransformTask[Any, TransformedType]":
+        """Create new Task that applies all transformations directly on the upstream task, in a single task"""
+        return TransformTask(self.upstream_task, func, _preceding_funcs=self._funcs)
 
 
 TaskArg: TypeAlias = OutputType | Task[OutputType]